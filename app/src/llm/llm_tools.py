@@ -1,6 +1,7 @@
 from langchain_core.tools import tool
 from slither import Slither
 from langchain_chroma import Chroma
+from chromadb.api.client import SharedSystemClient
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from langchain_community.document_loaders import JSONLoader
@@ -14,10 +15,27 @@ from slither.detectors.abstract_detector import AbstractDetector
 import os
 import inspect
 import json
+import uuid
 
 from .tool_type import ToolType
+from .results import DetectorCheck
+from .memory import analysis_scoped, current_analysis, memory_manager
+
+def _clear_chroma_systems() -> bool:
+    # delete_collection drops the collection, but chromadb's shared System keeps its segments alive for the process lifetime
+    systems = list(SharedSystemClient._identifer_to_system.values())
+    if not systems:
+        return False
+    for system in systems:
+        system.stop()
+    SharedSystemClient.clear_system_cache()
+    return True
+
+# in-flight analyses use the shared System, so it can only go when nothing runs; size is only known after eviction
+memory_manager.register_cache("chroma_system", _clear_chroma_systems, priority=10, idle_only=True)
 
 @tool
+@analysis_scoped
 def initiate_detectors_check(address: str, query: str) -> dict:
     """
     This function will perform initial analysis of the contract at the given address and identify the list of detectors required to run on the contract.
@@ -37,7 +55,7 @@ def initiate_detectors_check(address: str, query: str) -> dict:
         }
     
     try:
-        slither = Slither(address, etherscan_api_key=os.getenv('ETHERSCAN_API_KEY'))
+        slither = _load_slither(address)
     except Exception as e:
         print(f"Error getting contract at address: {address}. Error: {e}")
         return {
@@ -59,7 +77,11 @@ def initiate_detectors_check(address: str, query: str) -> dict:
     docs = loader.load()
     #print(f'Loaded documents: {docs}')
 
-    vectorstore = Chroma.from_documents(documents=docs, embedding=OpenAIEmbeddings())
+    # own collection per analysis, so parallel checks don't delete each other's collection
+    vectorstore = Chroma(collection_name=f"detectors-{uuid.uuid4().hex}", embedding_function=OpenAIEmbeddings())
+    # registered before the embeddings call, so the collection is dropped on every exit path
+    current_analysis().on_release(vectorstore.delete_collection)
+    vectorstore.add_documents(docs)
 
     retriever = vectorstore.as_retriever()
     def format_docs(docs):
@@ -85,24 +107,9 @@ def initiate_detectors_check(address: str, query: str) -> dict:
     # Assuming `selected_detectors` and `results` are already defined and aligned by index
     for i, detector in enumerate(selected_detectors):
         corresponding_result = results[i]  # Directly access the result by index
-        if len(corresponding_result) > 0:
-            # Assuming corresponding_result is a dictionary and you want to print some info
-            print(f"Detector {detector.ARGUMENT} - Results: {len(corresponding_result)}")
-            final_data.append({
-                "detector_id": detector.ARGUMENT,
-                "detector_info": _transform_detector(detector),
-                "detector_check_result": [_transform_result(result) for result in corresponding_result]
-            })
-        else:
-            # Handle the case where the result is an empty list or None
-            print(f"Detector {detector.ARGUMENT} - No results found")
-            final_data.append({
-                "detector_id": detector.ARGUMENT,
-                "detector_info": _transform_detector(detector),
-                "detector_check_result": []
-            })
-    print(f"Final data: {final_data}")
-    vectorstore.delete_collection()
+        print(f"Detector {detector.ARGUMENT} - Results: {len(corresponding_result) if corresponding_result else 'No results found'}")
+        final_data.append(DetectorCheck.from_slither(detector, corresponding_result))
+    print(f"Final data: {len(final_data)} detectors, {sum(len(c.detector_check_result) for c in final_data)} findings")
 
     return {
         "type": ToolType.DETECTORS_CHECK,
@@ -111,11 +118,12 @@ def initiate_detectors_check(address: str, query: str) -> dict:
     }
 
 @tool
+@analysis_scoped
 def mint_check(address: str) -> dict:
     """
     This function checks if the contract at the given address overrides the _mint function. So it is a mint check which only applies to tokens that have a mint function.
     """
-    slither = Slither(address, etherscan_api_key=os.getenv('ETHERSCAN_API_KEY'))
+    slither = _load_slither(address)
     source_code = slither.source_code
     target = slither.compilation_units[0]
     print('Checking mint function in the contract')
@@ -139,12 +147,13 @@ def mint_check(address: str) -> dict:
     }
 
 @tool
+@analysis_scoped
 def unprotected_func(address: str) -> dict:
     """
     This function checks if the contract at the given address has any unprotected functions. 
     It checks if the contract has any public or external functions that are not protected by the onlyOwner modifier.
     """
-    slither = Slither(address, etherscan_api_key=os.getenv('ETHERSCAN_API_KEY'))
+    slither = _load_slither(address)
     source_code = slither.source_code
 
     whitelist = ['balanceOf(address)']
@@ -179,52 +188,12 @@ def skip_security_checks() -> dict:
         "result": "Security checks skipped."
     }
 
+def _load_slither(address: str) -> Slither:
+    resources = current_analysis()
+    # per-request export dir, removed together with the rest of the analysis resources
+    slither = Slither(address, etherscan_api_key=os.getenv('ETHERSCAN_API_KEY'), export_dir=resources.export_dir)
+    resources.slithers.append(slither)
+    return slither
+
 def get_tools():
     return [initiate_detectors_check, mint_check, unprotected_func, skip_security_checks]
-
-def _transform_detector(detector):
-    transformed = {
-        #"key": detector.KEY,
-        "argument": str(detector.ARGUMENT),
-        "help": str(detector.HELP),
-        "impact": str(detector.IMPACT),
-        "confidence": str(detector.CONFIDENCE),
-        "wiki": str(detector.WIKI),
-        "wiki_title": str(detector.WIKI_TITLE),
-        "wiki_description": str(detector.WIKI_DESCRIPTION),
-        "wiki_exploit_scenario": str(detector.WIKI_EXPLOIT_SCENARIO),
-        "wiki_recommendation": str(detector.WIKI_RECOMMENDATION)
-    }
-    return transformed
-
-def _transform_result(data):
-    transformed = {
-        "check": data["check"],
-        "impact": data["impact"],
-        "confidence": data["confidence"],
-        "description": data["description"],
-        "elements": [_parse_element(el) for el in data["elements"]]
-    }
-    return transformed
-
-def _parse_element(element):
-    parsed = {
-        "type": element["type"],
-        "name": element["name"]
-    }
-
-    has_specific_fields = (
-        "type_specific_fields" in element and 
-        element["type_specific_fields"] is not None and 
-        "parent" in element["type_specific_fields"] and 
-        element["type_specific_fields"]["parent"] is not None)
-
-    # if element has specific fields to save
-    if has_specific_fields:
-        parsed["type_specific_fields"] = {
-            "parent": {
-                "type": element["type_specific_fields"]["parent"]["type"],
-                "name": element["type_specific_fields"]["parent"]["name"]
-            }
-        }
-    return parsed
\ No newline at end of file
@@ -1,4 +1,3 @@
-import json
 from operator import itemgetter
 from typing import Union
 from telegram import Update
@@ -19,6 +18,7 @@ from langchain_core.prompts import ChatPromptTemplate
 from .llm_tools import get_tools
 from .llm_tools import initiate_detectors_check, skip_security_checks
 from .tool_type import ToolType
+from .results import DetectorChecks, dumps
 
 class MainLlm():
     def __init__(self):
@@ -28,6 +28,14 @@ class MainLlm():
         self.scope = {}
 
     async def call(self, query, tg_update: Update):
+        # scope only lives for one request, otherwise it keeps growing (and mixes contracts) for the whole process lifetime
+        self.scope = {}
+        try:
+            return await self._call(query, tg_update)
+        finally:
+            self.scope = {}
+
+    async def _call(self, query, tg_update: Update):
         tg_update.message.reply_text('Hmm... Let me see what I can do for you...')
         # self.scope["query"] = query
         toolsLlm = ChatOpenAI(model="gpt-3.5-turbo-0125")
@@ -38,9 +46,10 @@ class MainLlm():
         ## TODO: we can add history in context here
         callResult = toolsChain.invoke(query)
         if len(callResult) > 0:
-            print(f"Result: {callResult}")
+            print(f"Result: tools {[r['type'] for r in callResult]}")
             parsedResult = callResult[0]["output"]
             await self._add_to_scope(parsedResult, tg_update)
+            print(f"Scope after initial check: {self._describe_scope()}")
             
             print(f"Received result for initial check with type: {parsedResult['type']}")
             toolsLlmBinded = toolsLlm.bind_tools(self.tools) # activate all tools
@@ -59,12 +68,12 @@ class MainLlm():
                     Question: {input}
                 """)
                 toolsChain = toolsLlmBinded | JsonOutputToolsParser() | self.call_tool_list
-                callResult = toolsChain.invoke(toolsPrompt.format_prompt(context=json.dumps(self.scope), input=query))
+                callResult = toolsChain.invoke(toolsPrompt.format_prompt(context=dumps(self.scope), input=query))
                 parsedResult = callResult[0]["output"]
                 await self._add_to_scope(parsedResult, tg_update)
                 strict_stop += 1
                 print(f"Received result for {strict_stop} check with type: {parsedResult['type']}")
-        print(f"Final result: {self.scope}")
+        print(f"Final result: {self._describe_scope()}")
         await tg_update.message.reply_text("Putting all the reports and sources together...")
 
         llm = ChatOpenAI(model="gpt-4-turbo")
@@ -89,7 +98,7 @@ class MainLlm():
             | llm
             | StrOutputParser()
         )
-        res = rag_chain.invoke({"input": query, "context": callResult})
+        res = rag_chain.invoke({"input": query, "context": dumps(callResult)})
         # print(f"Result: {res}")
         return res
 
@@ -99,22 +108,26 @@ class MainLlm():
         tool = self.tool_map[tool_invocation["type"]]
         return RunnablePassthrough.assign(output=itemgetter("args") | tool)
     
+    def _describe_scope(self) -> str:
+        # counts only, the scope holds the full results and source code
+        checks = [f"{d.detector_id}: {len(d.detector_check_result)} findings" for d in self.scope.get("detectors_checks", [])]
+        other = [key for key in self.scope if key not in ("detectors_checks", "source_code")]
+        return f"detectors [{', '.join(checks)}], other checks {other}, source code loaded: {'source_code' in self.scope}"
+
     async def _add_to_scope(self, result, tg_update):
         type = result["type"]
         if type == ToolType.SKIP_SECURITY_CHECKS:
             return
         
         if type == ToolType.DETECTORS_CHECK:
-            if "detectors_checks" in self.scope and "detectors_checks" in result:
-                ## TODO: merge smarter
-                self.scope["detectors_checks"] = self.scope["detectors_checks"] + result["detectors_checks"]
-            elif "detectors_checks" in result:
-                self.scope["detectors_checks"] = result["detectors_checks"]
+            if "detectors_checks" in result:
+                # merged by (detector, element set), so repeated rounds don't pile up duplicates
+                self.scope.setdefault("detectors_checks", DetectorChecks()).merge(result["detectors_checks"])
             if "source_code" in result and result["source_code"] is not None and not ("source_code" in self.scope):
                 self.scope["source_code"] = result["source_code"]
             if "source_code" in result and result["source_code"] is not None:
                 used_detectors = result["detectors_checks"]
-                used_detectors_ids = [f"`{d["detector_id"]}`: found {len(d["detector_check_result"])} issues" for d in used_detectors]
+                used_detectors_ids = [f"`{d.detector_id}`: found {len(d.detector_check_result)} issues" for d in used_detectors]
                 await tg_update.message.reply_text("Okay, I ran Slither detectors on the contract's source code. Here is the detectors I decided to check this time:\n"+
                 f"{"\n".join([id for id in used_detectors_ids])}\n" + "Now, let me see if I need to run more checks...", parse_mode="Markdown")
             return
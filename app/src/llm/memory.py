@@ -0,0 +1,242 @@
+import asyncio
+import ctypes
+import functools
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable
+
+# Memory accounting for the long-running bot process.
+# Keeps track of RSS per cache and per in-flight analysis, evicts caches when the process goes over budget,
+# and makes sure per-request resources (vector collections, Slither instances, crytic-export dirs) are released.
+
+_current_analysis: ContextVar["AnalysisResources | None"] = ContextVar("current_analysis", default=None)
+
+_MB = 1024 * 1024
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def current_rss() -> int | None:
+    """Resident set size of the current process, in bytes. None where it can't be read (not on Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return None
+
+def peak_rss() -> int:
+    """Peak resident set size of the current process, in bytes. Only for reports, it never goes down."""
+    import resource
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes everywhere else
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+@functools.cache
+def _libc():
+    try:
+        return ctypes.CDLL("libc.so.6")
+    except OSError:
+        return None
+
+def _malloc_trim():
+    # glibc keeps freed arenas mapped, so RSS doesn't drop after big Slither runs without this
+    libc = _libc()
+    if libc is not None and hasattr(libc, "malloc_trim"):
+        libc.malloc_trim(0)
+
+def _reclaim():
+    gc.collect()
+    _malloc_trim()
+
+@dataclass(slots=True)
+class _Cache:
+    name: str
+    priority: int
+    evict: Callable[[], bool] # returns False if there was nothing to free
+    size: Callable[[], int] | None # estimate, RSS freed on eviction is the real number
+    idle_only: bool # can't be evicted while analyses are in flight
+    reclaimed: int | None = None # RSS actually freed by the last eviction
+
+class AnalysisResources():
+    """Per-request resources, released by MemoryManager.analysis on every exit path."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started_at = time.monotonic()
+        self.started_rss = current_rss()
+        self.slithers = []
+        self._export_dir = None
+        self._cleanups: list[Callable[[], None]] = []
+
+    @property
+    def export_dir(self) -> str:
+        """Temp crytic-export dir for this request, so downloaded sources don't pile up in the working dir."""
+        if self._export_dir is None:
+            self._export_dir = tempfile.mkdtemp(prefix="crytic-export-")
+        return self._export_dir
+
+    def on_release(self, cleanup: Callable[[], None]):
+        self._cleanups.append(cleanup)
+
+    def release(self):
+        while self._cleanups:
+            cleanup = self._cleanups.pop()
+            try:
+                cleanup()
+            except Exception as e:
+                print(f"Error releasing resource for {self.label}. Error: {e}")
+        self.slithers.clear()
+        if self._export_dir is not None:
+            shutil.rmtree(self._export_dir, ignore_errors=True)
+            self._export_dir = None
+
+class MemoryManager():
+    def __init__(self, budget: int | None = None):
+        self._budget = budget
+        self._caches: dict[str, _Cache] = {}
+        self._analyses: dict[int, AnalysisResources] = {}
+        self._snapshots = deque(maxlen=2)
+        self._tracing_task = None
+        self._tracing_loop = None
+
+    @property
+    def budget(self) -> int:
+        # read lazily, .env is only loaded after the llm package is imported
+        if self._budget is None:
+            self._budget = int(os.getenv("MEMORY_BUDGET_MB", "768")) * _MB
+        return self._budget
+
+    def register_cache(self, name: str, evict: Callable[[], bool], size: Callable[[], int] | None = None,
+                       priority: int = 0, idle_only: bool = False):
+        """Caches with lower priority are evicted first. `evict` returns whether it freed anything,
+        `size` is an optional estimate shown in the report."""
+        self._caches[name] = _Cache(name, priority, evict, size, idle_only)
+
+    @contextmanager
+    def analysis(self, label: str):
+        self.relieve_pressure()
+        resources = AnalysisResources(label)
+        self._analyses[id(resources)] = resources
+        token = _current_analysis.set(resources)
+        try:
+            yield resources
+        finally:
+            _current_analysis.reset(token)
+            resources.release()
+            del self._analyses[id(resources)]
+            _reclaim()
+            self.relieve_pressure()
+
+    def relieve_pressure(self) -> list[str]:
+        """Evict caches in priority order until RSS is back under budget. Returns names of evicted caches."""
+        rss = current_rss()
+        # without the current RSS (only peak is available) there is no way to tell if eviction helps
+        if rss is None or rss <= self.budget:
+            return []
+        _reclaim()
+        evicted = []
+        for cache in sorted(self._caches.values(), key=lambda c: c.priority):
+            rss = current_rss()
+            if rss <= self.budget:
+                break
+            if (cache.idle_only and self._analyses) or (cache.size is not None and cache.size() == 0):
+                continue
+            # runs in the finally of every analysis, so an eviction error must not replace the tool's result
+            try:
+                freed = cache.evict()
+            except Exception as e:
+                print(f"Error evicting cache {cache.name}. Error: {e}")
+                continue
+            if not freed:
+                continue
+            _reclaim()
+            cache.reclaimed = max(rss - current_rss(), 0)
+            evicted.append(cache.name)
+        print(f"Memory pressure: evicted caches {evicted}, RSS is {current_rss() / _MB:.1f} MB of {self.budget / _MB:.0f} MB budget")
+        return evicted
+
+    def report(self) -> str:
+        rss = current_rss()
+        if rss is None:
+            lines = [f"Peak RSS: {peak_rss() / _MB:.1f} MB (current RSS not available, eviction disabled)"]
+        else:
+            lines = [f"RSS: {rss / _MB:.1f} MB of {self.budget / _MB:.0f} MB budget"]
+        for cache in sorted(self._caches.values(), key=lambda c: c.priority):
+            size = f"~{cache.size() / _MB:.2f} MB estimated" if cache.size is not None else "size unknown"
+            reclaimed = f"last eviction freed {cache.reclaimed / _MB:.2f} MB RSS" if cache.reclaimed is not None else "never evicted"
+            lines.append(f"cache {cache.name} (priority {cache.priority}): {size}, {reclaimed}")
+        now = time.monotonic()
+        for resources in self._analyses.values():
+            # RSS deltas overlap when several analyses run at once, so this is an upper bound
+            delta = f"+{max(rss - resources.started_rss, 0) / _MB:.1f} MB" if rss is not None else "RSS unknown"
+            lines.append(f"analysis {resources.label}: {delta}, running for {now - resources.started_at:.0f}s")
+        if not self._analyses:
+            lines.append("no analyses in flight")
+        return "\n".join(lines)
+
+    def take_snapshot(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._snapshots.append(tracemalloc.take_snapshot())
+
+    def start_tracing(self, interval: float) -> bool:
+        """Take tracemalloc snapshots every `interval` seconds. Returns False if already tracing."""
+        if self._tracing_task is not None:
+            return False
+        self.take_snapshot()
+        self._tracing_loop = asyncio.get_running_loop()
+        self._tracing_task = self._tracing_loop.create_task(self._snapshot_loop(interval))
+        return True
+
+    def stop_tracing(self) -> bool:
+        """Stop snapshots and tracemalloc. Returns False if it wasn't tracing."""
+        was_tracing = self._tracing_task is not None or tracemalloc.is_tracing()
+        if self._tracing_task is not None:
+            # may be called from a tool worker thread (eviction), and asyncio tasks aren't thread-safe
+            self._tracing_loop.call_soon_threadsafe(self._tracing_task.cancel)
+            self._tracing_task = None
+            self._tracing_loop = None
+        self._snapshots.clear()
+        tracemalloc.stop()
+        return was_tracing
+
+    def trace_report(self, limit: int = 10) -> str:
+        if len(self._snapshots) == 0:
+            return "No tracemalloc snapshots yet, start tracing first"
+        if len(self._snapshots) == 1:
+            stats = self._snapshots[-1].statistics("lineno")[:limit]
+            title = "Top allocations:"
+        else:
+            stats = self._snapshots[-1].compare_to(self._snapshots[0], "lineno")[:limit]
+            title = "Top allocation changes between the last two snapshots:"
+        return "\n".join([title] + [str(stat) for stat in stats])
+
+    async def _snapshot_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.take_snapshot()
+            self.relieve_pressure()
+
+memory_manager = MemoryManager()
+# debug snapshots are the cheapest thing to lose; tracemalloc's own trace storage is the size estimate
+memory_manager.register_cache("tracemalloc", memory_manager.stop_tracing,
+                              lambda: tracemalloc.get_tracemalloc_memory() if tracemalloc.is_tracing() else 0, priority=0)
+
+def current_analysis() -> AnalysisResources | None:
+    return _current_analysis.get()
+
+def analysis_scoped(func):
+    """Run the wrapped tool inside a memory_manager.analysis scope, available through current_analysis()."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # the tool's frame is gone by the time the scope exits, so its Slither instance can be collected
+        with memory_manager.analysis(f"{func.__name__} {kwargs.get('address', '')}".strip()):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,185 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from sys import intern
+
+import orjson
+
+# Compact, typed records for Slither detector results.
+# Names, impacts, confidences etc. repeat across thousands of findings, so all
+# short strings are interned and records use __slots__ instead of per-instance dicts.
+
+def _intern(value) -> str:
+    return intern(str(value))
+
+@dataclass(slots=True, frozen=True)
+class ElementParent:
+    type: str
+    name: str
+
+    def to_dict(self) -> dict:
+        return {"type": self.type, "name": self.name}
+
+@dataclass(slots=True, frozen=True)
+class Element:
+    type: str
+    name: str
+    parent: ElementParent | None = None
+
+    @classmethod
+    def from_slither(cls, element: dict) -> "Element":
+        fields = element.get("type_specific_fields")
+        parent = fields.get("parent") if fields is not None else None
+        return cls(
+            type=_intern(element["type"]),
+            name=_intern(element["name"]),
+            parent=ElementParent(_intern(parent["type"]), _intern(parent["name"])) if parent is not None else None
+        )
+
+    def to_dict(self) -> dict:
+        parsed = {"type": self.type, "name": self.name}
+        # only elements with a parent carry specific fields, same as before
+        if self.parent is not None:
+            parsed["type_specific_fields"] = {"parent": self.parent.to_dict()}
+        return parsed
+
+@dataclass(slots=True)
+class Finding:
+    check: str
+    impact: str
+    confidence: str
+    description: str
+    elements: tuple[Element, ...]
+
+    @classmethod
+    def from_slither(cls, data: dict) -> "Finding":
+        return cls(
+            check=_intern(data["check"]),
+            impact=_intern(data["impact"]),
+            confidence=_intern(data["confidence"]),
+            description=data["description"],
+            elements=tuple(Element.from_slither(el) for el in data["elements"])
+        )
+
+    @property
+    def key(self) -> tuple[str, frozenset[Element]]:
+        """Merge key: the same detector firing on the same set of elements is the same finding."""
+        return (self.check, frozenset(self.elements))
+
+    def to_dict(self) -> dict:
+        return {
+            "check": self.check,
+            "impact": self.impact,
+            "confidence": self.confidence,
+            "description": self.description,
+            "elements": self.elements
+        }
+
+@dataclass(slots=True, frozen=True)
+class DetectorInfo:
+    argument: str
+    help: str
+    impact: str
+    confidence: str
+    wiki: str
+    wiki_title: str
+    wiki_description: str
+    wiki_exploit_scenario: str
+    wiki_recommendation: str
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def from_detector(detector) -> "DetectorInfo":
+        # detector classes are static, so build their info once per process
+        return DetectorInfo(
+            argument=_intern(detector.ARGUMENT),
+            help=str(detector.HELP),
+            impact=_intern(detector.IMPACT),
+            confidence=_intern(detector.CONFIDENCE),
+            wiki=str(detector.WIKI),
+            wiki_title=str(detector.WIKI_TITLE),
+            wiki_description=str(detector.WIKI_DESCRIPTION),
+            wiki_exploit_scenario=str(detector.WIKI_EXPLOIT_SCENARIO),
+            wiki_recommendation=str(detector.WIKI_RECOMMENDATION)
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "argument": self.argument,
+            "help": self.help,
+            "impact": self.impact,
+            "confidence": self.confidence,
+            "wiki": self.wiki,
+            "wiki_title": self.wiki_title,
+            "wiki_description": self.wiki_description,
+            "wiki_exploit_scenario": self.wiki_exploit_scenario,
+            "wiki_recommendation": self.wiki_recommendation
+        }
+
+@dataclass(slots=True)
+class DetectorCheck:
+    detector_id: str
+    detector_info: DetectorInfo
+    detector_check_result: list[Finding] = field(default_factory=list)
+
+    @classmethod
+    def from_slither(cls, detector, results: list[dict] | None) -> "DetectorCheck":
+        return cls(
+            detector_id=_intern(detector.ARGUMENT),
+            detector_info=DetectorInfo.from_detector(detector),
+            detector_check_result=[Finding.from_slither(result) for result in results or []]
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "detector_id": self.detector_id,
+            "detector_info": self.detector_info,
+            "detector_check_result": self.detector_check_result
+        }
+
+class DetectorChecks():
+    """Detector checks collected across tool rounds, merged by (detector, element set)."""
+
+    __slots__ = ("_checks", "_seen")
+
+    def __init__(self, checks: list[DetectorCheck] | None = None):
+        self._checks: dict[str, DetectorCheck] = {}
+        self._seen: set[tuple[str, tuple[str, frozenset[Element]]]] = set()
+        if checks:
+            self.merge(checks)
+
+    def merge(self, checks: list[DetectorCheck]) -> int:
+        """Merge new checks in place, dropping findings already seen. Returns the number of new findings."""
+        added = 0
+        for check in checks:
+            existing = self._checks.get(check.detector_id)
+            if existing is None:
+                existing = DetectorCheck(check.detector_id, check.detector_info)
+                self._checks[check.detector_id] = existing
+            for finding in check.detector_check_result:
+                key = (check.detector_id, finding.key)
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                existing.detector_check_result.append(finding)
+                added += 1
+        return added
+
+    def __iter__(self):
+        return iter(self._checks.values())
+
+    def __len__(self) -> int:
+        return len(self._checks)
+
+    def to_list(self) -> list[DetectorCheck]:
+        return list(self._checks.values())
+
+def _default(obj):
+    if isinstance(obj, DetectorChecks):
+        return obj.to_list()
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(obj) -> str:
+    """Serialize records (and plain dicts/lists holding them) to the same JSON shape the nested dicts used to have."""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_DATACLASS).decode()
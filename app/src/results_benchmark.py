@@ -0,0 +1,141 @@
+import json
+import time
+import tracemalloc
+
+from llm.results import DetectorCheck, DetectorChecks, dumps
+
+# Memory and serialization benchmark for detector results.
+# Compares the old nested dicts + json.dumps against the typed records + orjson on a large synthetic result set,
+# and separately shows what the keyed merge drops when several tool rounds return the same findings.
+# Run from the app folder: python src/results_benchmark.py
+
+DETECTORS_COUNT = 40
+FINDINGS_PER_DETECTOR = 500
+ELEMENTS_PER_FINDING = 4
+ROUNDS = 3 # tool rounds in MainLlm.call
+
+class FakeDetector():
+    HELP = "Synthetic detector used for benchmarking"
+    IMPACT = "Medium"
+    CONFIDENCE = "High"
+    WIKI = "https://github.com/crytic/slither/wiki/Detector-Documentation"
+    WIKI_TITLE = "Synthetic detector"
+    WIKI_DESCRIPTION = "Synthetic detector description " * 10
+    WIKI_EXPLOIT_SCENARIO = "Synthetic exploit scenario " * 10
+    WIKI_RECOMMENDATION = "Synthetic recommendation " * 5
+
+def _make_detectors():
+    return [type(f"Detector{i}", (FakeDetector,), {"ARGUMENT": f"detector-{i}"}) for i in range(DETECTORS_COUNT)]
+
+def _make_raw_results(detector):
+    # names are built at runtime (not literals), so they are not interned already, the same as Slither output
+    results = []
+    for i in range(FINDINGS_PER_DETECTOR):
+        elements = []
+        for j in range(ELEMENTS_PER_FINDING):
+            elements.append({
+                "type": "".join(["func", "tion"]),
+                "name": f"transfer{i}" if j == 0 else f"transfer{(i + j) % 50}",
+                "type_specific_fields": {
+                    "parent": {"type": "".join(["con", "tract"]), "name": f"Token{j % 5}"}
+                }
+            })
+        results.append({
+            "check": detector.ARGUMENT,
+            "impact": "".join(["Med", "ium"]),
+            "confidence": "".join(["Hi", "gh"]),
+            "description": f"Token{i % 5}.transfer{i % 50}(address,uint256) (crytic-export/etherscan-contracts/Token.sol#{i}-{i + 10}) is flagged\n",
+            "elements": elements
+        })
+    return results
+
+# old implementation, kept here for comparison only
+
+def _legacy_transform_detector(detector):
+    return {
+        "argument": str(detector.ARGUMENT),
+        "help": str(detector.HELP),
+        "impact": str(detector.IMPACT),
+        "confidence": str(detector.CONFIDENCE),
+        "wiki": str(detector.WIKI),
+        "wiki_title": str(detector.WIKI_TITLE),
+        "wiki_description": str(detector.WIKI_DESCRIPTION),
+        "wiki_exploit_scenario": str(detector.WIKI_EXPLOIT_SCENARIO),
+        "wiki_recommendation": str(detector.WIKI_RECOMMENDATION)
+    }
+
+def _legacy_parse_element(element):
+    parsed = {"type": element["type"], "name": element["name"]}
+    parent = (element.get("type_specific_fields") or {}).get("parent")
+    if parent is not None:
+        parsed["type_specific_fields"] = {"parent": {"type": parent["type"], "name": parent["name"]}}
+    return parsed
+
+def _legacy_transform_result(data):
+    return {
+        "check": data["check"],
+        "impact": data["impact"],
+        "confidence": data["confidence"],
+        "description": data["description"],
+        "elements": [_legacy_parse_element(el) for el in data["elements"]]
+    }
+
+def _build_legacy_round(detectors, raw):
+    return [{
+        "detector_id": d.ARGUMENT,
+        "detector_info": _legacy_transform_detector(d),
+        "detector_check_result": [_legacy_transform_result(r) for r in raw[d.ARGUMENT]]
+    } for d in detectors]
+
+def _build_typed_round(detectors, raw):
+    return [DetectorCheck.from_slither(d, raw[d.ARGUMENT]) for d in detectors]
+
+def _measure_round(name, build, serialize, detectors, raw):
+    start = time.perf_counter()
+    build(detectors, raw)
+    build_time = time.perf_counter() - start
+
+    # tracemalloc slows allocations down a lot, so memory is measured on a separate build
+    tracemalloc.start()
+    checks = build(detectors, raw)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    serialized = serialize({"detectors_checks": checks})
+    serialize_time = time.perf_counter() - start
+
+    print(f"{name:>8}: retained {retained / 1024 / 1024:8.2f} MB | build {build_time * 1000:8.1f} ms | "
+          f"serialize {serialize_time * 1000:8.1f} ms | {len(serialized) / 1024 / 1024:8.2f} MB JSON")
+    return serialized
+
+def _merge_rounds(detectors, raw):
+    # legacy concatenated every round into the scope, the typed scope merges by (detector, element set)
+    legacy = []
+    typed = DetectorChecks()
+    for _ in range(ROUNDS):
+        legacy = legacy + _build_legacy_round(detectors, raw)
+        typed.merge(_build_typed_round(detectors, raw))
+    legacy_json = json.dumps({"detectors_checks": legacy})
+    typed_json = dumps({"detectors_checks": typed})
+    for name, checks, serialized in (("concat", legacy, legacy_json), ("merged", typed, typed_json)):
+        findings = sum(len(d["detector_check_result"]) for d in json.loads(serialized)["detectors_checks"])
+        print(f"{name:>8}: {findings} findings | {len(serialized) / 1024 / 1024:8.2f} MB JSON")
+
+def main():
+    detectors = _make_detectors()
+    raw = {d.ARGUMENT: _make_raw_results(d) for d in detectors}
+
+    # model and serializer only: one round, no duplicates on either side
+    print(f"One round: {DETECTORS_COUNT} detectors x {FINDINGS_PER_DETECTOR} findings x {ELEMENTS_PER_FINDING} elements")
+    legacy = _measure_round("legacy", _build_legacy_round, json.dumps, detectors, raw)
+    typed = _measure_round("typed", _build_typed_round, dumps, detectors, raw)
+    assert json.loads(typed) == json.loads(legacy), "typed serializer changed the JSON shape"
+    print("JSON shape matches the legacy output")
+
+    # merge only: the same results returned by several tool rounds
+    print(f"{ROUNDS} rounds with the same results:")
+    _merge_rounds(detectors, raw)
+
+if __name__ == '__main__':
+    main()
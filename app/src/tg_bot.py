@@ -2,9 +2,11 @@ from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackContext
 
 from dotenv import load_dotenv
+import math
 import os
 
 from llm import MainLlm
+from llm.memory import memory_manager
 
 load_dotenv()
 llm = MainLlm()
@@ -52,12 +54,39 @@ async def process_request(update: Update, text: str, context: CallbackContext):
     await update.message.reply_text(response, parse_mode="Markdown")
     await context.bot.delete_message(chat_id=update.effective_chat.id, message_id=bot_message.message_id)
 
+MEMORY_USAGE = "Usage: /memory, /memory trace on [interval seconds], /memory trace off, /memory top"
+
+async def handle_memory(update: Update, context: CallbackContext):
+    # debug only, see MEMORY_USAGE
+    args = context.args or []
+    if args[:2] == ["trace", "on"]:
+        try:
+            interval = float(args[2]) if len(args) > 2 else 60
+        except ValueError:
+            interval = 0
+        if not math.isfinite(interval) or interval <= 0:
+            await update.message.reply_text(MEMORY_USAGE)
+            return
+        started = memory_manager.start_tracing(interval)
+        await update.message.reply_text(f"Taking tracemalloc snapshots every {interval:.0f}s" if started else "Already tracing")
+    elif args[:2] == ["trace", "off"]:
+        memory_manager.stop_tracing()
+        await update.message.reply_text("Stopped tracing")
+    elif args[:1] == ["top"]:
+        await update.message.reply_text(memory_manager.trace_report())
+    elif not args:
+        await update.message.reply_text(memory_manager.report())
+    else:
+        await update.message.reply_text(MEMORY_USAGE)
+
 def main() -> None:
     app = Application.builder().token(os.getenv('TELEGRAM_TOKEN')).build()
     # Handlers define how different types of updates are handled
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("test1", handle_test1))
     app.add_handler(CommandHandler("test2", handle_test2))
+    if os.getenv('MEMORY_DEBUG'):
+        app.add_handler(CommandHandler("memory", handle_memory))
     # Add a message handler
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))  
 